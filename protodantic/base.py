@@ -1,43 +1,795 @@
 from __future__ import annotations
 
+import functools
+import itertools
 import struct
 import types
 from enum import IntEnum
-from io import BytesIO
-from typing import Union, get_args, get_origin
+from typing import (Any, Callable, ClassVar, NamedTuple, Union, get_args,
+                    get_origin)
 
-from google.protobuf.internal.decoder import _DecodeVarint  # type: ignore
-from google.protobuf.internal.encoder import _EncodeVarint  # type: ignore
+from google.protobuf import (descriptor_pb2, descriptor_pool, message_factory,
+                             unknown_fields)
+from google.protobuf.internal import api_implementation
 from google.protobuf.internal.wire_format import (WIRETYPE_FIXED32,
                                                   WIRETYPE_FIXED64,
                                                   WIRETYPE_LENGTH_DELIMITED,
                                                   WIRETYPE_VARINT)
+from google.protobuf.message import DecodeError, Message
 from pydantic import BaseModel
+from pydantic_core import PydanticUndefined
+
+# Kinds of values, resolved once per model class from the field annotations
+K_INT = 0
+K_ENUM = 1
+K_BOOL = 2
+K_FLOAT = 3
+K_STR = 4
+K_BYTES = 5
+K_NESTED = 6
+
+# Whether protobuf runs on a compiled backend (upb or cpp) that models can
+# opt in to delegate their (de)serialization to
+NATIVE_RUNTIME = api_implementation.Type() != 'python'
+
+# Pool holding the message descriptors synthesized from models
+_DESCRIPTOR_POOL = descriptor_pool.DescriptorPool()
+_message_ids = itertools.count()
+
+# Field types of synthesized descriptors. Integers are unsigned as the
+# Python encoder only writes non negative varints
+_FIELD_TYPES = {
+  K_INT: descriptor_pb2.FieldDescriptorProto.TYPE_UINT64,
+  K_ENUM: descriptor_pb2.FieldDescriptorProto.TYPE_UINT64,
+  K_BOOL: descriptor_pb2.FieldDescriptorProto.TYPE_BOOL,
+  K_FLOAT: descriptor_pb2.FieldDescriptorProto.TYPE_DOUBLE,
+  K_STR: descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+  K_BYTES: descriptor_pb2.FieldDescriptorProto.TYPE_BYTES,
+  K_NESTED: descriptor_pb2.FieldDescriptorProto.TYPE_MESSAGE,
+}
+
+# Attributes of protobuf messages that fields cannot be named after
+_MESSAGE_ATTRIBUTES = frozenset(dir(Message))
+
+
+class ProtoField(NamedTuple):
+  """Resolved protobuf layout of a single model field."""
+  number: int
+  name: str
+  # `list`, `dict` or None for singular fields
+  origin: type | None
+  # Kind and Optional-unwrapped type of the value (list items, map values)
+  kind: int
+  annotation: Any
+  # Varint encoded key, written as is before each value
+  key_bytes: bytes
+  default: Any
+  # How values equal to the default of an optional field are skipped: falsy
+  # defaults (0, "", [], ...) with a truth test, others with an equality test
+  omit_falsy: bool
+  compare_default: bool
+  # Encoder of repeated and map fields, keys included (None for singular
+  # fields, written inline by generated encoders), and of single values
+  encode: Callable[[ProtoField, Any, bytearray], None] | None
+  encode_value: Callable[[bytearray, Any], None]
+  # Decoders of the field and of its single values, indexed by wire type
+  decoders: tuple[Callable[[ProtoField, bytes, int], tuple[Any, int]] | None, ...]
+  value_decoders: tuple[Callable[[ProtoField, bytes, int], tuple[Any, int]] | None, ...]
+  # Repeated scalars written as a single length-delimited run of values
+  packed: bool = False
+  # Kind of the keys for map fields
+  map_key_kind: int | None = None
+  # Varint encoded keys of the key and value fields of map entries
+  map_key_key_bytes: bytes | None = None
+  map_value_key_bytes: bytes | None = None
+  # Encoder and decoders of the keys of map entries
+  encode_map_key: Callable[[bytearray, Any], None] | None = None
+  map_key_decoders: tuple[Callable[[ProtoField, bytes, int], tuple[Any, int]] | None, ...] | None = None
+
+
+# Little-endian doubles, for fixed64 values
+_DOUBLE = struct.Struct('<d')
+
+
+@functools.lru_cache(maxsize=64)
+def _doubles_struct(count: int) -> struct.Struct:
+  """Get the struct packing `count` little-endian doubles at once."""
+  return struct.Struct(f'<{count}d')
+
+
+def _write_varint(buf: bytearray, value: int):
+  """Append a varint to the buffer."""
+  while value > 0x7f:
+    buf.append((value & 0x7f) | 0x80)
+    value >>= 7
+  buf.append(value)
+
+
+def _patch_length(buf: bytearray, start: int):
+  """Write the length of the payload appended since `start` in the byte
+  reserved just before it, widening it if the payload is 128 bytes or more."""
+  size = len(buf) - start
+  if size < 0x80:
+    buf[start - 1] = size
+  else:
+    buf[start - 1:start] = _varint_bytes(size)
+
+
+def _varint_bytes(value: int) -> bytes:
+  """Encode a varint to bytes."""
+  buf = bytearray()
+  _write_varint(buf, value)
+  return bytes(buf)
+
+
+def _decode_varint(data: bytes, pos: int) -> tuple[int, int]:
+  """Decode a varint starting at `pos`, returning it with the position after it."""
+  try:
+    # Tags, small integers and short lengths fit in one or two bytes
+    byte = data[pos]
+    if byte < 0x80:
+      return byte, pos + 1
+    result = byte & 0x7f
+    byte = data[pos + 1]
+    if byte < 0x80:
+      return result | (byte << 7), pos + 2
+    result |= (byte & 0x7f) << 7
+    byte = data[pos + 2]
+    if byte < 0x80:
+      return result | (byte << 14), pos + 3
+    result |= (byte & 0x7f) << 14
+    byte = data[pos + 3]
+    if byte < 0x80:
+      return result | (byte << 21), pos + 4
+    result |= (byte & 0x7f) << 21
+    byte = data[pos + 4]
+    if byte < 0x80:
+      return result | (byte << 28), pos + 5
+    result |= (byte & 0x7f) << 28
+    pos += 5
+    shift = 35
+    while True:
+      byte = data[pos]
+      pos += 1
+      result |= (byte & 0x7f) << shift
+      if byte < 0x80:
+        return result, pos
+      shift += 7
+  except IndexError:
+    # The varint runs past the end of the input
+    raise ValueError("Truncated message") from None
+
+
+def _unwrap_optional(annotation):
+  """Strip `None` from an `Optional[T]` / `T | None` annotation."""
+  origin = get_origin(annotation)
+  if origin is Union or origin is types.UnionType:
+    anns = get_args(annotation)
+    anns = [ann for ann in anns if ann is not type(None)]
+    if len(anns) != 1:
+      raise ValueError(f"Unsupported Union type: {annotation}")
+    annotation = anns[0]
+  return annotation
+
+
+def _kind_for_annotation(annotation) -> int:
+  """Get the kind of a single (non repeated) value from its annotation."""
+  annotation = _unwrap_optional(annotation)
+  origin = get_origin(annotation)
+  if origin is list:
+    raise RuntimeError("list[list[T]] or dict[...,list[T]] not supported by protobuf")
+  if origin is dict:
+    raise RuntimeError("list[dict[T]] or dict[...,dict[T]] not supported by protobuf")
+  if annotation is bool:
+    return K_BOOL
+  if annotation is int:
+    return K_INT
+  if annotation is float:
+    return K_FLOAT
+  if annotation is str:
+    return K_STR
+  if annotation is bytes:
+    return K_BYTES
+  if isinstance(annotation, type) and issubclass(annotation, IntEnum):
+    return K_ENUM
+  if isinstance(annotation, type) and issubclass(annotation, ProtoModel):
+    return K_NESTED
+  raise ValueError(f"Unsupported field type: {annotation}")
+
+
+# Encoders of single values, by kind. Single byte varints are appended
+# inline, saving a call to _write_varint
+
+def _encode_int(buf: bytearray, value: int):
+  # IntEnum members are ints, written as is
+  if 0 <= value < 0x80:
+    buf.append(value)
+  else:
+    _write_varint(buf, value)
+
+
+def _encode_bool(buf: bytearray, value: bool):
+  buf.append(1 if value else 0)
+
+
+def _encode_double(buf: bytearray, value: float):
+  buf += _DOUBLE.pack(value)
+
+
+def _encode_str(buf: bytearray, value: str):
+  encoded = value.encode('utf-8')
+  size = len(encoded)
+  if size < 0x80:
+    buf.append(size)
+  else:
+    _write_varint(buf, size)
+  buf += encoded
+
+
+def _encode_bytes(buf: bytearray, value: bytes):
+  size = len(value)
+  if size < 0x80:
+    buf.append(size)
+  else:
+    _write_varint(buf, size)
+  buf += value
+
+
+def _encode_nested(buf: bytearray, value: ProtoModel):
+  # Nested message, encoded in place behind a one byte length that is
+  # widened afterwards if the message turns out to be longer
+  buf.append(0)
+  start = len(buf)
+  value._encode_into(buf)
+  _patch_length(buf, start)
+
+
+_VALUE_ENCODERS = {
+  K_INT: _encode_int,
+  K_ENUM: _encode_int,
+  K_BOOL: _encode_bool,
+  K_FLOAT: _encode_double,
+  K_STR: _encode_str,
+  K_BYTES: _encode_bytes,
+  K_NESTED: _encode_nested,
+}
+
+
+# Encoders of repeated and map fields, keys included
+
+def _encode_repeated(field: ProtoField, value: list, buf: bytearray):
+  key_bytes = field.key_bytes
+  encode_value = field.encode_value
+  for item in value:
+    buf += key_bytes
+    encode_value(buf, item)
+
+
+def _encode_packed(field: ProtoField, value: list, buf: bytearray, *,
+                   _write_varint=_write_varint, _patch_length=_patch_length, len=len):
+  if not value:
+    return
+  buf += field.key_bytes
+  buf.append(0)
+  start = len(buf)
+  # bool and IntEnum items are int subclasses, written as is
+  for item in value:
+    if 0 <= item < 0x80:
+      buf.append(item)
+    else:
+      _write_varint(buf, item)
+  _patch_length(buf, start)
+
+
+def _encode_packed_doubles(field: ProtoField, value: list, buf: bytearray):
+  if not value:
+    return
+  buf += field.key_bytes
+  _write_varint(buf, 8 * len(value))
+  buf += _doubles_struct(len(value)).pack(*value)
+
+
+def _encode_map(field: ProtoField, value: dict, buf: bytearray, *,
+                _patch_length=_patch_length, len=len):
+  key_bytes = field.key_bytes
+  map_key_key_bytes = field.map_key_key_bytes
+  map_value_key_bytes = field.map_value_key_bytes
+  encode_map_key = field.encode_map_key
+  encode_value = field.encode_value
+  # Entries are encoded in place, as nested messages
+  for dict_key, dict_value in value.items():
+    buf += key_bytes
+    buf.append(0)
+    start = len(buf)
+    buf += map_key_key_bytes
+    encode_map_key(buf, dict_key)
+    buf += map_value_key_bytes
+    encode_value(buf, dict_value)
+    _patch_length(buf, start)
+
+
+# Decoders of single values, returning them with the position after them
+
+def _decode_int(field: ProtoField, data: bytes, pos: int) -> tuple[int, int]:
+  return _decode_varint(data, pos)
+
+
+def _decode_bool(field: ProtoField, data: bytes, pos: int) -> tuple[bool, int]:
+  value, pos = _decode_varint(data, pos)
+  return bool(value), pos
+
+
+def _decode_double(field: ProtoField, data: bytes, pos: int) -> tuple[float, int]:
+  if pos + 8 > len(data):
+    raise ValueError("Truncated message")
+  return _DOUBLE.unpack_from(data, pos)[0], pos + 8
+
+
+def _decode_str(field: ProtoField, data: bytes, pos: int) -> tuple[str | bytes, int]:
+  length, pos = _decode_varint(data, pos)
+  end = pos + length
+  value = data[pos:end]
+  try:
+    return value.decode('utf-8'), end
+  except UnicodeDecodeError:
+    # Invalid UTF-8 is left for the model to reject, as the native runtime does
+    return value, end
+
+
+def _decode_bytes(field: ProtoField, data: bytes, pos: int) -> tuple[bytes, int]:
+  length, pos = _decode_varint(data, pos)
+  end = pos + length
+  return data[pos:end], end
+
+
+def _decode_nested(field: ProtoField, data: bytes, pos: int) -> tuple[ProtoModel, int]:
+  length, pos = _decode_varint(data, pos)
+  end = pos + length
+  return field.annotation._decode_proto(data, pos, end), end
+
+
+# Values of map entries missing their key or value field
+_KIND_DEFAULTS = {
+  K_INT: 0,
+  K_ENUM: 0,
+  K_BOOL: False,
+  K_FLOAT: 0.0,
+  K_STR: "",
+  K_BYTES: b"",
+}
+
+_VALUE_DECODERS = {
+  K_INT: _decode_int,
+  K_ENUM: _decode_int,
+  K_BOOL: _decode_bool,
+  K_FLOAT: _decode_double,
+  K_STR: _decode_str,
+  K_BYTES: _decode_bytes,
+  K_NESTED: _decode_nested,
+}
+
+# Raw values read for wire types that do not match the kind of the field.
+# Decoders are laid out in tuples indexed by the 3 bits of the wire type
+_WIRETYPE_DECODERS = (
+  _decode_int,  # WIRETYPE_VARINT
+  _decode_double,  # WIRETYPE_FIXED64
+  _decode_bytes,  # WIRETYPE_LENGTH_DELIMITED
+  None, None, None, None, None,
+)
+
+
+def _decode_packed(field: ProtoField, data: bytes, pos: int, *,
+                   _decode_varint=_decode_varint) -> tuple[list, int]:
+  """Decode a length-delimited run of packed varints."""
+  length, pos = _decode_varint(data, pos)
+  end = pos + length
+  if end > len(data):
+    raise ValueError("Truncated message")
+  values = []
+  append = values.append
+  while pos < end:
+    byte = data[pos]
+    if byte < 0x80:
+      append(byte)
+      pos += 1
+    else:
+      value, pos = _decode_varint(data, pos)
+      append(value)
+  if pos > end:
+    raise ValueError("Truncated message")
+  if field.kind == K_BOOL:
+    values = [bool(value) for value in values]
+  return values, end
+
+
+def _decode_packed_doubles(field: ProtoField, data: bytes, pos: int) -> tuple[list, int]:
+  """Decode a length-delimited run of packed doubles."""
+  length, pos = _decode_varint(data, pos)
+  if pos + length > len(data):
+    raise ValueError("Truncated message")
+  if length % 8:
+    raise ValueError(f"Invalid length of packed doubles: {length}")
+  return list(_doubles_struct(length // 8).unpack_from(data, pos)), pos + length
+
+
+def _decode_map_entry(field: ProtoField, data: bytes, pos: int, *,
+                      _decode_varint=_decode_varint,
+                      _WIRETYPE_DECODERS=_WIRETYPE_DECODERS) -> tuple[tuple, int]:
+  """Decode the key and value of a map entry."""
+  length, pos = _decode_varint(data, pos)
+  end = pos + length
+  if end > len(data):
+    raise ValueError("Truncated message")
+  entry_key = None
+  entry_value = None
+  map_key_decoders = field.map_key_decoders
+  value_decoders = field.value_decoders
+
+  while pos < end:
+    entry_tag, pos = _decode_varint(data, pos)
+    entry_field_number = entry_tag >> 3
+    entry_wire_type = entry_tag & 0x07
+
+    if entry_field_number == 1:  # Key field
+      decoders = map_key_decoders
+    elif entry_field_number == 2:  # Value field
+      decoders = value_decoders
+    else:
+      decoders = _WIRETYPE_DECODERS
+    decode = decoders[entry_wire_type]
+    if decode is None:
+      raise ValueError(f"Unsupported wire type: {entry_wire_type}")
+    value, pos = decode(field, data, pos)
+
+    if entry_field_number == 1:
+      entry_key = value
+    elif entry_field_number == 2:
+      entry_value = value
+
+  if pos > end:
+    raise ValueError("Truncated message")
+
+  # Missing keys and values take the default of their type
+  if entry_key is None:
+    entry_key = _KIND_DEFAULTS[field.map_key_kind]
+  if entry_value is None:
+    if field.kind == K_NESTED:
+      entry_value = field.annotation._decode_proto(b"")
+    else:
+      entry_value = _KIND_DEFAULTS[field.kind]
+  return (entry_key, entry_value), end
+
+
+def _with_decoder(decoders: tuple, wiretype: int, decode: Callable) -> tuple:
+  """Copy a table of decoders, replacing the decoder of a wire type."""
+  return decoders[:wiretype] + (decode,) + decoders[wiretype + 1:]
+
+
+def _value_decoders(kind: int, wiretype: int) -> tuple:
+  """Get the decoders of a single value by wire type."""
+  return _with_decoder(_WIRETYPE_DECODERS, wiretype, _VALUE_DECODERS[kind])
+
+
+def _decode_field(cls: type[ProtoModel], tag: int, data: bytes, pos: int,
+                  field_values: dict) -> int:
+  """Decode a field through the jump table of the model, adding its value to
+  `field_values` and returning the position after it."""
+  fields = cls.__proto_fields__
+  field_number = tag >> 3
+  field = fields[field_number] if field_number < len(fields) else None
+  if field is None:
+    raise ValueError(f"Unknown field number: {field_number}")
+  decode = field.decoders[tag & 0x07]
+  if decode is None:
+    raise ValueError(f"Unsupported wire type: {tag & 0x07}")
+  value, pos = decode(field, data, pos)
+
+  # Handle repeated fields (lists and dicts)
+  if field.origin is list:
+    if field.name not in field_values:
+      field_values[field.name] = []
+    if field.packed and tag & 0x07 == WIRETYPE_LENGTH_DELIMITED:
+      field_values[field.name].extend(value)
+    else:
+      field_values[field.name].append(value)
+  elif field.origin is dict:
+    if field.name not in field_values:
+      field_values[field.name] = {}
+    entry_key, entry_value = value
+    field_values[field.name][entry_key] = entry_value
+  else:
+    if field.kind == K_NESTED and field.name in field_values:
+      value = _merge_messages(field_values[field.name], value)
+    field_values[field.name] = value
+  return pos
+
+
+def _merge_messages(previous: Any, message: Any) -> Any:
+  """Merge a message into a previous occurrence of the same singular field.
+
+  As in protobuf, fields present in the message replace the previous
+  values, except repeated fields and maps which are concatenated and
+  nested messages which are merged in turn. Values read with another wire
+  type are not merged, the last one is left for the model to reject.
+  """
+  if not (isinstance(previous, ProtoModel) and isinstance(message, ProtoModel)):
+    return message
+  values = {name: previous.__dict__[name] for name in previous.model_fields_set}
+  for field in message.proto_schema():
+    if field.name not in message.model_fields_set:
+      continue
+    value = message.__dict__[field.name]
+    old = values.get(field.name)
+    if old is not None:
+      if field.origin is list:
+        value = old + value
+      elif field.origin is dict:
+        value = {**old, **value}
+      elif field.kind == K_NESTED:
+        value = _merge_messages(old, value)
+    values[field.name] = value
+  return type(message)(**values)
+
+
+# Code generation of the encoder and decoder of each model class. Scalar
+# fields are (de)serialized inline with their keys as literals, containers
+# through the encoders and decoders of their field
+
+def _compile_function(signature: str, lines: list[str], namespace: dict) -> Callable:
+  """Compile a generated function from its signature and body.
+
+  The helpers and constants of the namespace are bound as keyword-only
+  defaults, so the body reads them as locals rather than globals.
+  """
+  bindings = ", ".join(f"{name}={name}" for name in namespace)
+  if bindings:
+    signature = f"{signature[:-1]}, *, {bindings})"
+  exec("\n".join([f"def {signature}:", *lines]), namespace)
+  return namespace[signature[:signature.index("(")]]
+
+
+def _length_lines(name: str) -> list[str]:
+  """Lines reading a varint length at `pos` into `name`."""
+  return [
+    f"{name} = data[pos]",
+    f"if {name} < 0x80:",
+    "  pos += 1",
+    "else:",
+    f"  {name}, pos = _decode_varint(data, pos)",
+  ]
+
+
+def _encoder_lines(field: ProtoField, namespace: dict) -> list[str]:
+  """Lines encoding the non default `value` of a field into `buf`."""
+  key = repr(field.key_bytes)
+  if field.origin is not None:
+    namespace[f"_field_{field.number}"] = field
+    namespace[f"_encode_{field.number}"] = field.encode
+    return [f"_encode_{field.number}(_field_{field.number}, value, buf)"]
+  if field.kind == K_BOOL:
+    true_bytes = field.key_bytes + b"\x01"
+    if field.omit_falsy:
+      # Already guarded by a truth test
+      return [f"buf += {true_bytes!r}"]
+    false_bytes = field.key_bytes + b"\x00"
+    return [f"buf += {true_bytes!r} if value else {false_bytes!r}"]
+  if field.kind == K_FLOAT:
+    return [f"buf += {key}", "buf += _pack_double(value)"]
+  if field.kind == K_NESTED:
+    return [
+      f"buf += {key}",
+      "buf.append(0)",
+      "start = len(buf)",
+      "value._encode_into(buf)",
+      "_patch_length(buf, start)",
+    ]
+  if field.kind in (K_STR, K_BYTES):
+    lines = ["value = value.encode('utf-8')"] if field.kind == K_STR else []
+    return lines + [
+      f"buf += {key}",
+      "size = len(value)",
+      "if size < 0x80:",
+      "  buf.append(size)",
+      "else:",
+      "  _write_varint(buf, size)",
+      "buf += value",
+    ]
+  return [
+    f"buf += {key}",
+    "if 0 <= value < 0x80:",
+    "  buf.append(value)",
+    "else:",
+    "  _write_varint(buf, value)",
+  ]
+
+
+def _generate_encoder(schema: tuple[ProtoField, ...]) -> Callable[[ProtoModel, bytearray], None]:
+  """Generate the encoder of a model class from its schema."""
+  namespace = {
+    "_write_varint": _write_varint,
+    "_patch_length": _patch_length,
+    "_pack_double": _DOUBLE.pack,
+    "len": len,
+  }
+  # Pydantic stores field values in the instance __dict__, reading it
+  # directly skips the attribute lookup machinery of the model
+  lines = ["  values = self.__dict__"]
+  for field in schema:
+    lines.append(f"  value = values[{field.name!r}]")
+    # Skip None values, and default values of optional fields
+    if field.omit_falsy:
+      lines.append("  if value:")
+    elif field.compare_default:
+      namespace[f"_default_{field.number}"] = field.default
+      lines.append(f"  if value is not None and not value == _default_{field.number}:")
+    else:
+      lines.append("  if value is not None:")
+    lines.extend(f"    {line}" for line in _encoder_lines(field, namespace))
+  return _compile_function("_encode_into(self, buf)", lines, namespace)
+
+
+def _decoder_lines(field: ProtoField, namespace: dict) -> list[str]:
+  """Lines decoding the value of a field at `pos` into `values`."""
+  name = repr(field.name)
+  if field.origin is not None:
+    namespace[f"_field_{field.number}"] = field
+    namespace[f"_decode_{field.number}"] = field.decoders[WIRETYPE_LENGTH_DELIMITED]
+    lines = [f"value, pos = _decode_{field.number}(_field_{field.number}, data, pos)"]
+  elif field.kind == K_FLOAT:
+    return [
+      "if pos + 8 > end:",
+      "  raise ValueError('Truncated message')",
+      f"values[{name}] = _unpack_double(data, pos)[0]",
+      "pos += 8",
+    ]
+  elif field.kind in (K_INT, K_ENUM, K_BOOL):
+    lines = _length_lines("value")
+    return lines + [f"values[{name}] = value != 0" if field.kind == K_BOOL
+                    else f"values[{name}] = value"]
+  else:
+    lines = _length_lines("length") + ["stop = pos + length"]
+    if field.kind == K_STR:
+      lines += [
+        "value = data[pos:stop]",
+        "try:",
+        "  value = value.decode('utf-8')",
+        "except UnicodeDecodeError:",
+        "  pass",
+      ]
+    elif field.kind == K_BYTES:
+      lines.append("value = data[pos:stop]")
+    else:
+      namespace[f"_model_{field.number}"] = field.annotation
+      lines.append(f"value = _model_{field.number}._decode_proto(data, pos, stop)")
+    lines.append("pos = stop")
+    if field.kind == K_NESTED:
+      namespace["_merge_messages"] = _merge_messages
+      lines += [
+        f"if {name} in values:",
+        f"  value = _merge_messages(values[{name}], value)",
+      ]
+    return lines + [f"values[{name}] = value"]
+
+  if field.origin is dict:
+    return lines + [
+      "entry_key, entry_value = value",
+      f"entries = values.get({name})",
+      "if entries is None:",
+      f"  values[{name}] = {{entry_key: entry_value}}",
+      "else:",
+      "  entries[entry_key] = entry_value",
+    ]
+  return lines + [
+    f"items = values.get({name})",
+    "if items is None:",
+    f"  values[{name}] = value" if field.packed else f"  values[{name}] = [value]",
+    "else:",
+    "  items.extend(value)" if field.packed else "  items.append(value)",
+  ]
+
+
+def _generate_decoder(schema: tuple[ProtoField, ...]) -> Callable[..., ProtoModel]:
+  """Generate the decoder of a model class from its schema.
+
+  Fields written with their canonical key are decoded inline, others (e.g.
+  unpacked repeated scalars or unknown fields) through `_decode_field`.
+  Nested messages are decoded in place, between the bounds of their payload,
+  rather than from a copy of it.
+  """
+  namespace = {
+    "_decode_varint": _decode_varint,
+    "_decode_field": _decode_field,
+    "_unpack_double": _DOUBLE.unpack_from,
+    "len": len,
+  }
+  lines = [
+    "  values = {}",
+    "  if end is None:",
+    "    end = len(data)",
+    "  elif end > len(data):",
+    "    raise ValueError('Truncated message')",
+    "  while pos < end:",
+    *(f"    {line}" for line in _length_lines("tag")),
+    # Values take at least one byte, read inline after the tag
+    "    if pos == end:",
+    "      raise ValueError('Truncated message')",
+  ]
+  branch = "if"
+  for field in schema:
+    lines.append(f"    {branch} tag == {_decode_varint(field.key_bytes, 0)[0]}:")
+    lines.extend(f"      {line}" for line in _decoder_lines(field, namespace))
+    branch = "elif"
+  if schema:
+    lines += ["    else:", "      pos = _decode_field(cls, tag, data, pos, values)"]
+  else:
+    lines.append("    pos = _decode_field(cls, tag, data, pos, values)")
+  # Lengths running past the end of the message leave the cursor beyond it
+  lines += [
+    "  if pos > end:",
+    "    raise ValueError('Truncated message')",
+    "  return cls(**values)",
+  ]
+  return _compile_function("_decode_proto(cls, data, pos=0, end=None)", lines, namespace)
+
+
+def _encode_lazily(self: ProtoModel, buf: bytearray):
+  """Append the protobuf encoding of the model to the buffer, generating the
+  encoder of its class first."""
+  type(self).proto_schema()
+  self._encode_into(buf)
+
+
+def _decode_lazily(cls: type[ProtoModel], data: bytes, pos: int = 0,
+                   end: int | None = None) -> ProtoModel:
+  """Deserialize protobuf bytes, between `pos` and `end` if given, into the
+  model in Python, generating the decoder of its class first."""
+  cls.proto_schema()
+  return cls._decode_proto(data, pos, end)
+
 
 class ProtoModel(BaseModel):
 
+  # Built lazily on first (de)serialization, once per class
+  __proto_schema__: ClassVar[tuple[ProtoField, ...] | None] = None
+  # Fields indexed by their number, None for numbers without a field
+  __proto_fields__: ClassVar[tuple[ProtoField | None, ...] | None] = None
+  # Synthesized on first native (de)serialization, None if not representable
+  __proto_message__: ClassVar[type[Message] | None] = None
+  __proto_message_built__: ClassVar[bool] = False
+
+  # Delegate (de)serialization to the native protobuf runtime when possible
+  # (True), or always use the Python codec, even when nested in a native
+  # message (False). By default models use the Python codec, which is faster
+  # for most of them, and follow the enclosing message when nested
+  __proto_native__: ClassVar[bool | None] = None
+
+  @classmethod
+  def __pydantic_init_subclass__(cls, **kwargs):
+    super().__pydantic_init_subclass__(**kwargs)
+    # Do not inherit the schema of the parent class
+    cls.__proto_schema__ = None
+    cls.__proto_fields__ = None
+    cls.__proto_message__ = None
+    cls.__proto_message_built__ = False
+    cls._encode_into = _encode_lazily
+    cls._decode_proto = classmethod(_decode_lazily)
+
   @classmethod
   def get_wiretype_for_annotation(cls, annotation) -> int:
     """Get the wiretype for a given Pydantic field based on its annotation."""
+    annotation = _unwrap_optional(annotation)
     origin = get_origin(annotation)
 
-    # Handle Optional types
-    if origin is Union or origin is types.UnionType:
-      anns = get_args(annotation)
-      anns = [ann for ann in anns if ann is not type(None)]
-      if len(anns) != 1:
-        raise ValueError(f"Unsupported Union type: {annotation}")
-      annotation = anns[0]
-      origin = get_origin(annotation)
-
     # Handle list types
     if origin is list:
       return WIRETYPE_LENGTH_DELIMITED
     # Handle dict types (maps)
     if origin is dict:
       return WIRETYPE_LENGTH_DELIMITED
-    if annotation in {int, bool} or issubclass(annotation, IntEnum):
+    if annotation in {int, bool}:
         return WIRETYPE_VARINT  # varint
+    if isinstance(annotation, type) and issubclass(annotation, IntEnum):
+        return WIRETYPE_VARINT  # enum
     if annotation == float:
         return WIRETYPE_FIXED64  # 64-bit
     if annotation in {str, bytes}:
@@ -46,237 +798,315 @@ class ProtoModel(BaseModel):
         return WIRETYPE_LENGTH_DELIMITED  # nested message
     raise ValueError(f"Unsupported field type: {annotation}")
 
-  def build_key(self, field_number: int, annotation) -> int:
+  @classmethod
+  def build_key(cls, field_number: int, annotation) -> int:
     """Build the protobuf key from field number and wire type."""
-    return (field_number << 3) | self.get_wiretype_for_annotation(annotation)
+    return (field_number << 3) | cls.get_wiretype_for_annotation(annotation)
 
-  def _encode_value(self, value, annotation, output: BytesIO):
-    """Encode a single value based on its type."""
+  @classmethod
+  def build_proto_field(cls, field_number: int, field_name: str) -> ProtoField:
+    """Resolve the protobuf layout of a model field."""
+    field = cls.model_fields[field_name]
+    annotation = _unwrap_optional(field.annotation)
     origin = get_origin(annotation)
+    map_key_kind = None
+    map_key_key_bytes = map_value_key_bytes = None
+    encode_map_key = map_key_decoders = None
+    packed = False
 
-    # Handle Optional types
-    if origin is Union or origin is types.UnionType:
-      anns = get_args(annotation)
-      anns = [ann for ann in anns if ann is not type(None)]
-      if len(anns) == 1:
-        annotation = anns[0]
-        origin = get_origin(annotation)
-
-    # Handle list/dict types
-    if origin is list :
-      raise RuntimeError("list[list[T]] or dict[...,list[T]] not supported by protobuf")
+    if origin is list:
+      # Repeated scalars are packed behind a single length-delimited key,
+      # other values are each encoded with the key of the item type
+      value_annotation = get_args(annotation)[0]
+      item_wiretype = cls.get_wiretype_for_annotation(value_annotation)
+      packed = item_wiretype in (WIRETYPE_VARINT, WIRETYPE_FIXED64)
+      key = cls.build_key(field_number, annotation if packed else value_annotation)
+      if not packed:
+        encode = _encode_repeated
+      elif item_wiretype == WIRETYPE_FIXED64:
+        encode = _encode_packed_doubles
+      else:
+        encode = _encode_packed
     elif origin is dict:
-      raise RuntimeError("list[dict[T]] or dict[...,dict[T]] not supported by protobuf")
-    elif annotation == int:
-      _EncodeVarint(output.write, value)
-    elif issubclass(annotation, IntEnum):
-      _EncodeVarint(output.write, value.value)
-    elif annotation == bool:
-      _EncodeVarint(output.write, 1 if value else 0)
-    elif annotation == float:
-      output.write(struct.pack('<d', value))  # little-endian double
-    elif annotation == str:
-      encoded = value.encode('utf-8')
-      _EncodeVarint(output.write, len(encoded))
-      output.write(encoded)
-    elif annotation == bytes:
-      _EncodeVarint(output.write, len(value))
-      output.write(value)
-    elif isinstance(annotation, type) and issubclass(annotation, ProtoModel):
-      # Nested message
-      nested_bytes = value.model_dump_proto()
-      _EncodeVarint(output.write, len(nested_bytes))
-      output.write(nested_bytes)
+      map_key_annotation, value_annotation = get_args(annotation)
+      map_key_kind = _kind_for_annotation(map_key_annotation)
+      map_key_annotation = _unwrap_optional(map_key_annotation)
+      key = cls.build_key(field_number, annotation)
+      map_key_key_bytes = _varint_bytes(cls.build_key(1, map_key_annotation))
+      map_value_key_bytes = _varint_bytes(cls.build_key(2, value_annotation))
+      encode = _encode_map
+      encode_map_key = _VALUE_ENCODERS[map_key_kind]
+      map_key_decoders = _value_decoders(
+        map_key_kind, cls.get_wiretype_for_annotation(map_key_annotation))
     else:
-      raise ValueError(f"Unsupported value type: {annotation}")
-
-  def encode_list(self,key, value, annotation, output: BytesIO):
-    """Encode a list of values."""
-    inner_type = get_args(annotation)[0]
-    for item in value:
-      _EncodeVarint(output.write, key)
-      self._encode_value(item, inner_type, output)
-    
-  def endode_dict(self, key,  value, annotation, output: BytesIO):
-    """Encode a dictionary of key-value pairs."""
-    key_type, value_type = get_args(annotation)
-    key_key = (1 << 3) | self.get_wiretype_for_annotation(key_type)
-    value_key = (2 << 3) | self.get_wiretype_for_annotation(value_type)
-    for dict_key, dict_value in value.items():
-      _EncodeVarint(output.write, key)
-      item_output = BytesIO()
-      _EncodeVarint(item_output.write, key_key)
-      self._encode_value(dict_key, key_type, item_output)
-      _EncodeVarint(item_output.write, value_key)
-      self._encode_value(dict_value, value_type, item_output)
-      item_bytes = item_output.getvalue()
-      _EncodeVarint(output.write, len(item_bytes))
-      output.write(item_bytes)
-
-  def encode_field(self, field_number: int, value, annotation, output: BytesIO):
-    """Encode a single field with its key and value."""
-    key = self.build_key(field_number, annotation)
-    if get_origin(annotation) is list:
-      self.encode_list(key, value, annotation, output)
-    elif get_origin(annotation) is dict:
-      self.endode_dict(key, value, annotation, output)
+      origin = None
+      value_annotation = annotation
+      key = cls.build_key(field_number, annotation)
+      encode = None
+
+    kind = _kind_for_annotation(value_annotation)
+    wiretype = cls.get_wiretype_for_annotation(value_annotation)
+    value_decoders = _value_decoders(kind, wiretype)
+    if origin is dict:
+      decoders = _with_decoder(
+        (None,) * len(_WIRETYPE_DECODERS), WIRETYPE_LENGTH_DELIMITED, _decode_map_entry)
+    elif packed:
+      # Parsers must accept both packed and unpacked repeated scalars
+      decoders = _with_decoder(
+        value_decoders, WIRETYPE_LENGTH_DELIMITED,
+        _decode_packed_doubles if wiretype == WIRETYPE_FIXED64 else _decode_packed)
     else:
-      _EncodeVarint(output.write, key)
-      self._encode_value(value, annotation, output)
+      decoders = value_decoders
 
-  def model_dump_proto(self) -> bytes:
-    """Serialize the Pydantic model to protobuf bytes."""
-    output = BytesIO()
-    field_number = 1
+    has_default = (not field.is_required() and field.default is not None
+                   and field.default is not PydanticUndefined)
+    omit_falsy = has_default and not field.default
+
+    return ProtoField(
+      number=field_number,
+      name=field_name,
+      origin=origin,
+      kind=kind,
+      annotation=_unwrap_optional(value_annotation),
+      key_bytes=_varint_bytes(key),
+      default=field.default,
+      omit_falsy=omit_falsy,
+      compare_default=has_default and not omit_falsy,
+      encode=encode,
+      encode_value=_VALUE_ENCODERS[kind],
+      decoders=decoders,
+      value_decoders=value_decoders,
+      packed=packed,
+      map_key_kind=map_key_kind,
+      map_key_key_bytes=map_key_key_bytes,
+      map_value_key_bytes=map_value_key_bytes,
+      encode_map_key=encode_map_key,
+      map_key_decoders=map_key_decoders,
+    )
+
+  @classmethod
+  def proto_schema(cls) -> tuple[ProtoField, ...]:
+    """Get the protobuf layout of the model, resolved once per class."""
+    schema = cls.__proto_schema__
+    if schema is None:
+      # Fields are numbered from 1 following their declaration order
+      schema = tuple(
+        cls.build_proto_field(field_number, field_name)
+        for field_number, field_name in enumerate(cls.model_fields, start=1)
+      )
+      # Numbers are dense, the schema only needs a slot for number 0
+      cls.__proto_fields__ = (None,) + schema
+      # Set before the schema, which marks the class as ready to (de)serialize
+      cls._encode_into = _generate_encoder(schema)
+      cls._decode_proto = classmethod(_generate_decoder(schema))
+      cls.__proto_schema__ = schema
+    return schema
 
-    for field_name, field in self.model_fields.items():
-      value = getattr(self, field_name)
+  @classmethod
+  def _message_class(cls) -> type[Message] | None:
+    """Get the native protobuf message class of the model, synthesized once
+    per class on first use."""
+    if not cls.__proto_message_built__:
+      # Marked first, so recursive models see no message class while building
+      cls.__proto_message_built__ = True
+      if NATIVE_RUNTIME:
+        cls.proto_schema()
+        cls.__proto_message__ = cls._build_message_class()
+    return cls.__proto_message__
+
+  @classmethod
+  def _build_message_class(cls) -> type[Message] | None:
+    """Synthesize a native protobuf message class with the layout of the model.
+
+    Returns None when the model cannot be described by a protobuf message
+    (e.g. recursive models or invalid map keys), it is then only handled by
+    the Python codec.
+    """
+    message_id = next(_message_ids)
+    file_proto = descriptor_pb2.FileDescriptorProto(
+      name=f"protodantic/{message_id}.proto",
+      package="protodantic",
+      syntax="proto2",  # explicit presence, as the Python encoder
+    )
+    message_proto = file_proto.message_type.add(name=f"{cls.__name__}_{message_id}")
+
+    for field in cls.__proto_schema__:
+      if field.name in _MESSAGE_ATTRIBUTES:
+        return None
+      field_proto = message_proto.field.add(
+        name=field.name,
+        number=field.number,
+        label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL,
+        type=_FIELD_TYPES[field.kind],
+      )
+      if field.kind == K_NESTED:
+        nested_class = field.annotation._message_class()
+        if nested_class is None:
+          # Not representable, or still being built for a recursive model
+          return None
+        field_proto.type_name = "." + nested_class.DESCRIPTOR.full_name
+        if nested_class.DESCRIPTOR.file.name not in file_proto.dependency:
+          file_proto.dependency.append(nested_class.DESCRIPTOR.file.name)
 
-      # Skip None values for optional fields
+      if field.origin is list:
+        field_proto.label = descriptor_pb2.FieldDescriptorProto.LABEL_REPEATED
+        if field.packed:
+          field_proto.options.packed = True
+      elif field.origin is dict:
+        # Maps are repeated entries of a nested message type
+        entry_proto = message_proto.nested_type.add(
+          name="".join(part.capitalize() for part in field.name.split("_")) + "Entry")
+        entry_proto.options.map_entry = True
+        entry_proto.field.add(
+          name="key",
+          number=1,
+          label=descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL,
+          type=_FIELD_TYPES[field.map_key_kind],
+        )
+        value_proto = entry_proto.field.add()
+        value_proto.CopyFrom(field_proto)
+        value_proto.name = "value"
+        value_proto.number = 2
+        field_proto.label = descriptor_pb2.FieldDescriptorProto.LABEL_REPEATED
+        field_proto.type = descriptor_pb2.FieldDescriptorProto.TYPE_MESSAGE
+        field_proto.type_name = f".protodantic.{message_proto.name}.{entry_proto.name}"
+
+    try:
+      _DESCRIPTOR_POOL.Add(file_proto)
+      descriptor = _DESCRIPTOR_POOL.FindMessageTypeByName(
+        f"protodantic.{message_proto.name}")
+    except (TypeError, ValueError):
+      return None
+    return message_factory.GetMessageClass(descriptor)
+
+  # Replaced on each class by the encoder and decoder generated from its schema
+  _encode_into = _encode_lazily
+  _decode_proto = classmethod(_decode_lazily)
+
+  def _fill_message(self, message: Message) -> Message | None:
+    """Copy the fields of the model to a native protobuf message.
+
+    Returns None when a nested model opts out of the native runtime.
+    """
+    values = self.__dict__
+    for field in self.__proto_schema__:
+      value = values[field.name]
       if value is None:
-        field_number += 1
         continue
-
-      # Skip default values for optional fields
-      if not field.is_required() and value == field.default:
-        field_number += 1
+      if field.omit_falsy:
+        if not value:
+          continue
+      elif field.compare_default and value == field.default:
         continue
 
-      self.encode_field(field_number, value, field.annotation, output)
+      if field.origin is list:
+        if field.kind == K_NESTED:
+          items = getattr(message, field.name)
+          for item in value:
+            if item.__proto_native__ is False or item._fill_message(items.add()) is None:
+              return None
+        else:
+          getattr(message, field.name).extend(value)
+      elif field.origin is dict:
+        if field.kind == K_NESTED:
+          entries = getattr(message, field.name)
+          for entry_key, entry_value in value.items():
+            if (entry_value.__proto_native__ is False
+                or entry_value._fill_message(entries[entry_key]) is None):
+              return None
+        else:
+          getattr(message, field.name).update(value)
+      elif field.kind == K_NESTED:
+        if value.__proto_native__ is False:
+          return None
+        nested = getattr(message, field.name)
+        nested.SetInParent()
+        if value._fill_message(nested) is None:
+          return None
+      else:
+        setattr(message, field.name, value)
+    return message
 
-      field_number += 1
+  def _dump_native(self) -> bytes | None:
+    """Serialize the model with the native protobuf runtime, if possible."""
+    if not self.__proto_native__:
+      return None
+    message_class = self._message_class()
+    if message_class is None:
+      return None
+    try:
+      message = self._fill_message(message_class())
+      return None if message is None else message.SerializeToString()
+    except (AttributeError, TypeError, ValueError):
+      # Values out of the range of the descriptor, or nested subclasses with
+      # their own fields, are left to the Python encoder
+      return None
+
+  def model_dump_proto(self) -> bytes:
+    """Serialize the Pydantic model to protobuf bytes."""
+    self.proto_schema()
+    encoded = self._dump_native()
+    if encoded is not None:
+      return encoded
+    buf = bytearray()
+    self._encode_into(buf)
+    return bytes(buf)
 
-    return output.getvalue()
+  def model_dump_proto_into(self, buf: bytearray) -> int:
+    """Serialize the Pydantic model at the end of an existing buffer.
 
-  @classmethod
-  def _decode_varint(cls, stream: BytesIO) -> int:
-    """Decode a varint from the stream."""
-    result = 0
-    shift = 0
-    while True:
-      byte_data = stream.read(1)
-      if not byte_data:
-        break
-      byte = byte_data[0]
-      result |= (byte & 0x7f) << shift
-      if not (byte & 0x80):
-        break
-      shift += 7
-    return result
+    Returns the number of bytes written.
+    """
+    self.proto_schema()
+    encoded = self._dump_native()
+    if encoded is not None:
+      buf += encoded
+      return len(encoded)
+    start = len(buf)
+    self._encode_into(buf)
+    return len(buf) - start
 
   @classmethod
-  def model_validate_proto(cls, data: bytes):
-    """Deserialize protobuf bytes into the Pydantic model."""
-    stream = BytesIO(data)
+  def _from_message(cls, message: Message):
+    """Build the model from a native protobuf message."""
+    if len(unknown_fields.UnknownFieldSet(message)):
+      raise DecodeError("Unknown fields")
     field_values = {}
-
-    while stream.tell() < len(data):
-      # Read field tag
-      tag = cls._decode_varint(stream)
-      field_number = tag >> 3
-      wire_type = tag & 0x07
-
-      # Get field name from field number (1-indexed)
-      field_names = list(cls.model_fields.keys())
-      if field_number - 1 >= len(field_names):
-        raise ValueError(f"Unknown field number: {field_number}")
-
-      field_name = field_names[field_number - 1]
-      field = cls.model_fields[field_name]
-      annotation = field.annotation
-      origin = get_origin(annotation)
-
-      # Unwrap Optional
-      if origin is Union or origin is types.UnionType:
-        anns = get_args(annotation)
-        anns = [ann for ann in anns if ann is not type(None)]
-        if len(anns) == 1:
-          annotation = anns[0]
-
-          origin = get_origin(annotation)
-
-      # Parse based on wire type
-      if wire_type == WIRETYPE_VARINT:
-        value = cls._decode_varint(stream)
-        if annotation == bool:
-          value = bool(value)
-      elif wire_type == WIRETYPE_FIXED64:
-        value = struct.unpack('<d', stream.read(8))[0]
-      elif wire_type == WIRETYPE_LENGTH_DELIMITED:
-        length = cls._decode_varint(stream)
-        data_bytes = stream.read(length)
-
-        if annotation == str:
-          value = data_bytes.decode('utf-8')
-        elif annotation == bytes:
-          value = data_bytes
-        elif origin is list:
-          # Nested message or repeated field
-          inner_type = get_args(annotation)[0]
-          if isinstance(inner_type, type) and issubclass(inner_type, ProtoModel):
-            value = inner_type.model_validate_proto(data_bytes)
-          else:
-            value = data_bytes        
-        elif origin is dict:
-          # Map entry - parse key and value fields
-          key_type, value_type = get_args(annotation)
-          entry_stream = BytesIO(data_bytes)
-          entry_key = None
-          entry_value = None
-          
-          while entry_stream.tell() < len(data_bytes):
-            entry_tag = cls._decode_varint(entry_stream)
-            entry_field_number = entry_tag >> 3
-            entry_wire_type = entry_tag & 0x07
-            
-            if entry_field_number == 1:  # Key field
-              if entry_wire_type == WIRETYPE_VARINT:
-                entry_key = cls._decode_varint(entry_stream)
-              elif entry_wire_type == WIRETYPE_LENGTH_DELIMITED:
-                key_length = cls._decode_varint(entry_stream)
-                key_bytes = entry_stream.read(key_length)
-                if key_type == str:
-                  entry_key = key_bytes.decode('utf-8')
-                else:
-                  entry_key = key_bytes
-            elif entry_field_number == 2:  # Value field
-              if entry_wire_type == WIRETYPE_VARINT:
-                entry_value = cls._decode_varint(entry_stream)
-                if value_type == bool:
-                  entry_value = bool(entry_value)
-              elif entry_wire_type == WIRETYPE_FIXED64:
-                entry_value = struct.unpack('<d', entry_stream.read(8))[0]
-              elif entry_wire_type == WIRETYPE_LENGTH_DELIMITED:
-                value_length = cls._decode_varint(entry_stream)
-                value_bytes = entry_stream.read(value_length)
-                if value_type == str:
-                  entry_value = value_bytes.decode('utf-8')
-                elif value_type == bytes:
-                  entry_value = value_bytes
-                elif isinstance(value_type, type) and issubclass(value_type, ProtoModel):
-                  entry_value = value_type.model_validate_proto(value_bytes)
-                else:
-                  entry_value = value_bytes
-          
-          value = (entry_key, entry_value)
-        elif isinstance(annotation, type) and issubclass(annotation, ProtoModel):
-          value = annotation.model_validate_proto(data_bytes)
+    for field in cls.__proto_schema__:
+      value = getattr(message, field.name)
+      if field.kind == K_NESTED and field.annotation.__proto_native__ is False:
+        raise DecodeError("Nested model opted out of the native runtime")
+      if field.origin is list:
+        if not value:
+          continue
+        if field.kind == K_NESTED:
+          value = [field.annotation._from_message(item) for item in value]
         else:
-          value = data_bytes
-      else:
-        raise ValueError(f"Unsupported wire type: {wire_type}")
-
-      # Handle repeated fields (lists and dicts)
-      if origin is list:
-        if field_name not in field_values:
-          field_values[field_name] = []
-        field_values[field_name].append(value)
-      elif origin is dict:
-        if field_name not in field_values:
-          field_values[field_name] = {}
-        entry_key, entry_value = value
-        field_values[field_name][entry_key] = entry_value
-      else:
-        field_values[field_name] = value
+          value = list(value)
+      elif field.origin is dict:
+        if not value:
+          continue
+        if field.kind == K_NESTED:
+          value = {entry_key: field.annotation._from_message(entry_value)
+                   for entry_key, entry_value in value.items()}
+        else:
+          value = dict(value)
+      elif not message.HasField(field.name):
+        continue
+      elif field.kind == K_NESTED:
+        value = field.annotation._from_message(value)
+      field_values[field.name] = value
+    return cls(**field_values)
 
-    return cls(**field_values)
\ No newline at end of file
+  @classmethod
+  def model_validate_proto(cls, data: bytes):
+    """Deserialize protobuf bytes into the Pydantic model."""
+    cls.proto_schema()
+    message_class = cls._message_class() if cls.__proto_native__ else None
+    if message_class is not None:
+      try:
+        return cls._from_message(message_class.FromString(data))
+      except DecodeError:
+        # Let the Python decoder handle, or report, what the runtime rejected
+        pass
+    return cls._decode_proto(data)
@@ -3,12 +3,14 @@ from __future__ import annotations
 from enum import Enum, IntEnum
 
 import pytest
+from pydantic import ValidationError, field_validator
 
-from protodantic.base import ProtoModel
+from protodantic.base import NATIVE_RUNTIME, ProtoModel
 
 from .proto.test_pb2 import Address as PBAddress
 from .proto.test_pb2 import Contact as PBContact
 from .proto.test_pb2 import Person as PBPerson
+from .proto.test_pb2 import Scores as PBScores
 from .proto.test_pb2 import Status as PBStatus
 
 
@@ -41,6 +43,40 @@ class Person(ProtoModel):
     status: Status = Status.UNKNOWN
     skills : dict[str, int] = {}
 
+class Empty(ProtoModel):
+    count: int = 0
+
+class Holder(ProtoModel):
+    empty: Empty
+
+class Node(ProtoModel):
+    value: int
+    child: Node | None = None
+
+class Defaults(ProtoModel):
+    count: int = 5
+    label: str = ""
+    ratio: float = 0.0
+    flag: bool = False
+
+class Pair(ProtoModel):
+    first: int = 0
+    second: int = 0
+
+class Wrapper(ProtoModel):
+    pair: Pair | None = None
+
+class Labeled(Empty):
+    label: str = ""
+
+@pytest.fixture(autouse=True, params=["native", "python"])
+def codec(request, monkeypatch):
+    """Run every test with the native protobuf runtime and the Python codec."""
+    if request.param == "native" and not NATIVE_RUNTIME:
+        pytest.skip("protobuf is running on its pure Python implementation")
+    monkeypatch.setattr(ProtoModel, "__proto_native__", True if request.param == "native" else None)
+    return request.param
+
 @pytest.fixture
 def pb_contact():
     return PBContact(type="phone", value="123-456-7890", id=b'\x01\x02\x03')
@@ -169,3 +205,189 @@ def test_auto_enc_person(person):
     encoded = person.model_dump_proto()
     obj = Person.model_validate_proto(encoded)
     assert obj == person
+
+class Scores(ProtoModel):
+    values: list[int] = []
+    weights: dict[int, float] = {}
+    statuses: list[Status] = []
+    flags: list[bool] = []
+    ratios: list[float] = []
+
+@pytest.fixture
+def scores():
+    return Scores(
+        values=[1, 300, 70000, 2**35, 2**63],
+        statuses=[Status.ACTIVE, Status.PENDING],
+        flags=[True, False, True],
+        ratios=[0.5, -1.25, 3e100],
+    )
+
+@pytest.fixture
+def pb_scores():
+    return PBScores(
+        values=[1, 300, 70000, 2**35, 2**63],
+        statuses=[PBStatus.ACTIVE, PBStatus.PENDING],
+        flags=[True, False, True],
+        ratios=[0.5, -1.25, 3e100],
+    )
+
+def test_scores_serialization(scores, pb_scores):
+    encoded = scores.model_dump_proto()
+    assert encoded == pb_scores.SerializeToString()
+
+def test_scores_2_1(scores, pb_scores):
+    obj = Scores.model_validate_proto(pb_scores.SerializeToString())
+    assert obj == scores
+
+def test_unpacked_repeated_int():
+    obj = Scores.model_validate_proto(b'\x08\x01\x08\xac\x02\x0a\x02\x03\x04')
+    assert obj.values == [1, 300, 3, 4]
+
+def test_unpacked_repeated_double():
+    obj = Scores.model_validate_proto(b'\x29\x00\x00\x00\x00\x00\x00\xe0\x3f\x2a\x08\x00\x00\x00\x00\x00\x00\xf0\x3f')
+    assert obj.ratios == [0.5, 1.0]
+
+def test_auto_enc_repeated_int(scores):
+    scores.weights = {1: 0.5, 2: 1.5}
+    encoded = scores.model_dump_proto()
+    obj = Scores.model_validate_proto(encoded)
+    assert obj == scores
+
+def test_long_nested_1_2(person):
+    person.address = Address(street="x" * 300, city="Anytown", zipcode="12345")
+    encoded = person.model_dump_proto()
+    pb_person = PBPerson()
+    pb_person.ParseFromString(encoded)
+    assert pb_person.address.street == person.address.street
+    assert pb_person.address.city == person.address.city
+    assert Person.model_validate_proto(encoded) == person
+
+def test_long_map_entry(person):
+    person.skills = {"x" * 300: 1, "Python": 5}
+    encoded = person.model_dump_proto()
+    pb_person = PBPerson()
+    pb_person.ParseFromString(encoded)
+    assert dict(pb_person.skills) == person.skills
+    assert Person.model_validate_proto(encoded) == person
+
+def test_dump_into_buffer(address, contact):
+    buf = bytearray(b'prefix')
+    size = address.model_dump_proto_into(buf)
+    assert size == len(address.model_dump_proto())
+    contact.model_dump_proto_into(buf)
+    assert bytes(buf) == b'prefix' + address.model_dump_proto() + contact.model_dump_proto()
+
+def test_auto_enc_empty_nested():
+    holder = Holder(empty=Empty())
+    encoded = holder.model_dump_proto()
+    assert encoded == b'\x0a\x00'
+    assert Holder.model_validate_proto(encoded) == holder
+
+def test_auto_enc_recursive():
+    node = Node(value=1, child=Node(value=2, child=Node(value=3)))
+    encoded = node.model_dump_proto()
+    assert Node.model_validate_proto(encoded) == node
+
+def test_unknown_field():
+    with pytest.raises(ValueError, match="Unknown field number: 4"):
+        Address.model_validate_proto(b'\x0a\x01a\x20\x01')
+
+def test_unsupported_wire_type():
+    with pytest.raises(ValueError, match="Unsupported wire type: 5"):
+        Address.model_validate_proto(b'\x0d\x00\x00\x00\x00')
+
+def test_default_values_skipped():
+    assert Defaults().model_dump_proto() == b''
+    defaults = Defaults(count=0, label="x")
+    encoded = defaults.model_dump_proto()
+    assert encoded == b'\x08\x00\x12\x01x'
+    assert Defaults.model_validate_proto(encoded) == defaults
+    assert Defaults(flag=True).model_dump_proto() == b'\x20\x01'
+
+
+def test_subclass_fields():
+    assert Empty(count=1).model_dump_proto() == b'\x08\x01'
+    labeled = Labeled(count=1, label="x")
+    encoded = labeled.model_dump_proto()
+    assert encoded == b'\x08\x01\x12\x01x'
+    assert Labeled.model_validate_proto(encoded) == labeled
+
+def test_unsupported_annotation():
+    class Tagged(ProtoModel):
+        tags: set[int]
+
+    with pytest.raises(ValueError, match="Unsupported field type"):
+        Tagged(tags={1}).model_dump_proto()
+
+def test_repeated_nested_merged():
+    encoded = b'\x0a\x02\x08\x01\x0a\x02\x10\x02'
+    assert Wrapper.model_validate_proto(encoded) == Wrapper(pair=Pair(first=1, second=2))
+
+def test_repeated_nested_wire_type_mismatch():
+    # The last occurrence wins when it is not a message
+    with pytest.raises(ValidationError):
+        Wrapper.model_validate_proto(b'\x0a\x00\x08\x01')
+    assert Wrapper.model_validate_proto(b'\x08\x01\x0a\x00') == Wrapper(pair=Pair())
+
+def test_map_entry_defaults():
+    assert Scores.model_validate_proto(b'\x12\x02\x08\x07').weights == {7: 0.0}
+    assert Scores.model_validate_proto(b'\x12\x00').weights == {0: 0.0}
+
+def test_invalid_utf8():
+    with pytest.raises(ValidationError, match="valid string"):
+        Defaults.model_validate_proto(b'\x12\x01\xff')
+
+def test_nested_opt_out(monkeypatch):
+    monkeypatch.setattr(Pair, "__proto_native__", False)
+    wrapper = Wrapper(pair=Pair(first=1))
+    encoded = wrapper.model_dump_proto()
+    assert wrapper._dump_native() is None
+    decoded = []
+    decode = Pair._decode_proto
+    monkeypatch.setattr(Pair, "_decode_proto", classmethod(
+        lambda cls, *args: decoded.append(args) or decode(*args)))
+    assert Wrapper.model_validate_proto(encoded) == wrapper
+    assert decoded
+
+@pytest.mark.parametrize("encoded", [
+    b'\x08\x80',  # varint
+    b'\x19\x00\x00',  # double
+    b'\x12\x05ab',  # string
+])
+def test_truncated_message(encoded):
+    with pytest.raises(ValueError, match="Truncated message"):
+        Defaults.model_validate_proto(encoded)
+
+@pytest.mark.parametrize("encoded", [
+    b'\x2a\x03\x00\x00\x00',
+    b'\x2a\x09' + bytes(9),
+])
+def test_invalid_packed_doubles(encoded):
+    with pytest.raises(ValueError, match="Invalid length of packed doubles"):
+        Scores.model_validate_proto(encoded)
+
+def test_validator_errors_propagate():
+    class Picky(ProtoModel):
+        count: int = 0
+
+        @field_validator("count")
+        @classmethod
+        def check_count(cls, value):
+            if value > 10:
+                raise IndexError("too many")
+            return value
+
+    with pytest.raises(IndexError, match="too many"):
+        Picky.model_validate_proto(b'\x08\x20')
+
+def test_truncated_nested():
+    with pytest.raises(ValueError, match="Truncated message"):
+        Wrapper.model_validate_proto(b'\x0a\x05\x08\x01')
+
+def test_native_opt_in(monkeypatch):
+    monkeypatch.setattr(ProtoModel, "__proto_native__", None)
+    wrapper = Wrapper(pair=Pair(first=1))
+    assert wrapper._dump_native() is None
+    monkeypatch.setattr(Wrapper, "__proto_native__", True)
+    assert (wrapper._dump_native() is not None) == NATIVE_RUNTIME
+    assert Wrapper.model_validate_proto(wrapper.model_dump_proto()) == wrapper
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\ntest.proto\x12\x07\x65xample\"9\n\x07\x41\x64\x64ress\x12\x0e\n\x06street\x18\x01 \x01(\t\x12\x0c\n\x04\x63ity\x18\x02 \x01(\t\x12\x10\n\x08zip_code\x18\x03 \x01(\t\"\xd8\x02\n\x06Person\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0b\n\x03\x61ge\x18\x02 \x01(\x05\x12\r\n\x05\x65mail\x18\x03 \x01(\t\x12\x12\n\x05phone\x18\x04 \x01(\tH\x00\x88\x01\x01\x12!\n\x07\x61\x64\x64ress\x18\x05 \x01(\x0b\x32\x10.example.Address\x12\x0f\n\x07hobbies\x18\x06 \x03(\t\x12\x11\n\tis_active\x18\x07 \x01(\x08\x12\x13\n\x06salary\x18\x08 \x01(\x01H\x01\x88\x01\x01\x12\"\n\x08\x63ontacts\x18\t \x03(\x0b\x32\x10.example.Contact\x12\x1f\n\x06status\x18\n \x01(\x0e\x32\x0f.example.Status\x12+\n\x06skills\x18\x0b \x03(\x0b\x32\x1b.example.Person.SkillsEntry\x1a-\n\x0bSkillsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x05:\x02\x38\x01\x42\x08\n\x06_phoneB\t\n\x07_salary\"2\n\x07\x43ontact\x12\n\n\x02id\x18\x01 \x01(\x0c\x12\x0c\n\x04type\x18\x02 \x01(\t\x12\r\n\x05value\x18\x03 \x01(\t*<\n\x06Status\x12\x0b\n\x07UNKNOWN\x10\x00\x12\n\n\x06\x41\x43TIVE\x10\x01\x12\x0c\n\x08INACTIVE\x10\x02\x12\x0b\n\x07PENDING\x10\x03\x62\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\ntest.proto\x12\x07\x65xample\"9\n\x07\x41\x64\x64ress\x12\x0e\n\x06street\x18\x01 \x01(\t\x12\x0c\n\x04\x63ity\x18\x02 \x01(\t\x12\x10\n\x08zip_code\x18\x03 \x01(\t\"\xd8\x02\n\x06Person\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0b\n\x03\x61ge\x18\x02 \x01(\x05\x12\r\n\x05\x65mail\x18\x03 \x01(\t\x12\x12\n\x05phone\x18\x04 \x01(\tH\x00\x88\x01\x01\x12!\n\x07\x61\x64\x64ress\x18\x05 \x01(\x0b\x32\x10.example.Address\x12\x0f\n\x07hobbies\x18\x06 \x03(\t\x12\x11\n\tis_active\x18\x07 \x01(\x08\x12\x13\n\x06salary\x18\x08 \x01(\x01H\x01\x88\x01\x01\x12\"\n\x08\x63ontacts\x18\t \x03(\x0b\x32\x10.example.Contact\x12\x1f\n\x06status\x18\n \x01(\x0e\x32\x0f.example.Status\x12+\n\x06skills\x18\x0b \x03(\x0b\x32\x1b.example.Person.SkillsEntry\x1a-\n\x0bSkillsEntry\x12\x0b\n\x03key\x18\x01 \x01(\t\x12\r\n\x05value\x18\x02 \x01(\x05:\x02\x38\x01\x42\x08\n\x06_phoneB\t\n\x07_salary\"2\n\x07\x43ontact\x12\n\n\x02id\x18\x01 \x01(\x0c\x12\x0c\n\x04type\x18\x02 \x01(\t\x12\r\n\x05value\x18\x03 \x01(\t\"\xb9\x01\n\x06Scores\x12\x0e\n\x06values\x18\x01 \x03(\x04\x12-\n\x07weights\x18\x02 \x03(\x0b\x32\x1c.example.Scores.WeightsEntry\x12!\n\x08statuses\x18\x03 \x03(\x0e\x32\x0f.example.Status\x12\r\n\x05\x66lags\x18\x04 \x03(\x08\x12\x0e\n\x06ratios\x18\x05 \x03(\x01\x1a.\n\x0cWeightsEntry\x12\x0b\n\x03key\x18\x01 \x01(\x05\x12\r\n\x05value\x18\x02 \x01(\x01:\x02\x38\x01*<\n\x06Status\x12\x0b\n\x07UNKNOWN\x10\x00\x12\n\n\x06\x41\x43TIVE\x10\x01\x12\x0c\n\x08INACTIVE\x10\x02\x12\x0b\n\x07PENDING\x10\x03\x62\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -33,8 +33,10 @@ if not _descriptor._USE_C_DESCRIPTORS:
   DESCRIPTOR._loaded_options = None
   _globals['_PERSON_SKILLSENTRY']._loaded_options = None
   _globals['_PERSON_SKILLSENTRY']._serialized_options = b'8\001'
-  _globals['_STATUS']._serialized_start=481
-  _globals['_STATUS']._serialized_end=541
+  _globals['_SCORES_WEIGHTSENTRY']._loaded_options = None
+  _globals['_SCORES_WEIGHTSENTRY']._serialized_options = b'8\001'
+  _globals['_STATUS']._serialized_start=669
+  _globals['_STATUS']._serialized_end=729
   _globals['_ADDRESS']._serialized_start=23
   _globals['_ADDRESS']._serialized_end=80
   _globals['_PERSON']._serialized_start=83
@@ -43,4 +45,8 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_PERSON_SKILLSENTRY']._serialized_end=406
   _globals['_CONTACT']._serialized_start=429
   _globals['_CONTACT']._serialized_end=479
+  _globals['_SCORES']._serialized_start=482
+  _globals['_SCORES']._serialized_end=667
+  _globals['_SCORES_WEIGHTSENTRY']._serialized_start=621
+  _globals['_SCORES_WEIGHTSENTRY']._serialized_end=667
 # @@protoc_insertion_point(module_scope)
@@ -70,3 +70,24 @@ class Contact(_message.Message):
     type: str
     value: str
     def __init__(self, id: _Optional[bytes] = ..., type: _Optional[str] = ..., value: _Optional[str] = ...) -> None: ...
+
+class Scores(_message.Message):
+    __slots__ = ("values", "weights", "statuses", "flags", "ratios")
+    class WeightsEntry(_message.Message):
+        __slots__ = ("key", "value")
+        KEY_FIELD_NUMBER: _ClassVar[int]
+        VALUE_FIELD_NUMBER: _ClassVar[int]
+        key: int
+        value: float
+        def __init__(self, key: _Optional[int] = ..., value: _Optional[float] = ...) -> None: ...
+    VALUES_FIELD_NUMBER: _ClassVar[int]
+    WEIGHTS_FIELD_NUMBER: _ClassVar[int]
+    STATUSES_FIELD_NUMBER: _ClassVar[int]
+    FLAGS_FIELD_NUMBER: _ClassVar[int]
+    RATIOS_FIELD_NUMBER: _ClassVar[int]
+    values: _containers.RepeatedScalarFieldContainer[int]
+    weights: _containers.ScalarMap[int, float]
+    statuses: _containers.RepeatedScalarFieldContainer[Status]
+    flags: _containers.RepeatedScalarFieldContainer[bool]
+    ratios: _containers.RepeatedScalarFieldContainer[float]
+    def __init__(self, values: _Optional[_Iterable[int]] = ..., weights: _Optional[_Mapping[int, float]] = ..., statuses: _Optional[_Iterable[_Union[Status, str]]] = ..., flags: _Optional[_Iterable[bool]] = ..., ratios: _Optional[_Iterable[float]] = ...) -> None: ...